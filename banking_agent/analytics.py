@@ -0,0 +1,139 @@
+# banking_agent/analytics.py
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Keyword rules used to derive a spending category from a transaction description.
+# The first matching rule wins; anything unmatched is "other".
+CATEGORY_KEYWORDS = (
+    ("groceries", ("grocery", "supermarket", "market")),
+    ("fuel", ("gas station", "fuel", "petrol")),
+    ("utilities", ("utility", "electric", "water", "internet", "phone bill")),
+    ("dining", ("restaurant", "cafe", "coffee", "dining")),
+    ("shopping", ("store", "shop", "amazon")),
+    ("transfers", ("payment of", "transfer")),
+    ("deposits", ("deposit", "salary", "payroll")),
+)
+OTHER_CATEGORY = "other"
+CATEGORY_NAMES = tuple(category for category, _ in CATEGORY_KEYWORDS) + (OTHER_CATEGORY,)
+
+PERIODS = ("this_week", "last_7_days", "last_30_days", "this_month", "last_month", "this_year")
+
+
+@lru_cache(maxsize=4096)
+def categorize(description: str) -> str:
+    text = description.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return OTHER_CATEGORY
+
+
+def normalize_category(category: str):
+    """
+    Maps what a caller asked for ("Groceries", "grocery", "gas station") to a
+    category name, or None when it matches none of CATEGORY_NAMES.
+    """
+    text = category.strip().lower()
+    if text in CATEGORY_NAMES:
+        return text
+    derived = categorize(text)
+    return derived if derived != OTHER_CATEGORY else None
+
+
+class SpendingAnalytics:
+    """
+    Keeps per-account spending rollups, bucketed by day and by month and
+    broken down by category:
+
+        rollups[account_number]["by_day"]["2025-06-01"]["groceries"] = {"spent": .., "received": .., "count": ..}
+
+    The rollups sit next to the transaction store they summarize: like
+    `all_transactions`, state["spending_rollups"] is one dict shared by every
+    session (see OmnibankContext.CUSTOMER_BANKING_CONTEXT), built once with
+    build_rollups() and kept up to date by record_transaction(), which
+    OmnibankContext.update_balance calls for every new transaction. Queries
+    only touch the buckets in the requested period.
+    """
+    @staticmethod
+    def _add(buckets: dict, key: str, category: str, amount: float):
+        totals = buckets.setdefault(key, {}).setdefault(category, {"spent": 0.0, "received": 0.0, "count": 0})
+        if amount < 0:
+            totals["spent"] += -amount
+        else:
+            totals["received"] += amount
+        totals["count"] += 1
+
+    @staticmethod
+    def _apply(rollups: dict, txn: dict):
+        account = rollups.setdefault(txn["account_number"], {"by_day": {}, "by_month": {}})
+        category = categorize(txn.get("description", ""))
+        SpendingAnalytics._add(account["by_day"], txn["date"], category, txn["amount"])
+        SpendingAnalytics._add(account["by_month"], txn["date"][:7], category, txn["amount"])
+
+    @staticmethod
+    def build_rollups(transactions: dict) -> dict:
+        """Builds rollups for a whole transaction store. Only needed once per store."""
+        rollups = {}
+        for txn in list(transactions.values()):
+            SpendingAnalytics._apply(rollups, txn)
+        return rollups
+
+    @staticmethod
+    def ensure_rollups(state) -> dict:
+        # States initialised from CUSTOMER_BANKING_CONTEXT already share prebuilt rollups;
+        # this only builds for a state that brings its own transaction store.
+        rollups = state.get("spending_rollups")
+        if rollups is None:
+            rollups = SpendingAnalytics.build_rollups(state.get("all_transactions", {}))
+            state["spending_rollups"] = rollups
+        return rollups
+
+    @staticmethod
+    def record_transaction(state, txn: dict):
+        # A store without rollups yet will pick this transaction up from all_transactions when they are built.
+        rollups = state.get("spending_rollups")
+        if rollups is not None:
+            SpendingAnalytics._apply(rollups, txn)
+
+    @staticmethod
+    def resolve_period(period: str, today: date = None):
+        """
+        Maps a period name (see PERIODS) or a "YYYY-MM" month to the buckets
+        that cover it: ("by_month", [months]) or ("by_day", [days]).
+        """
+        today = today or datetime.now().date()
+        if period == "this_week":
+            start = today - timedelta(days=today.weekday())
+            return "by_day", [(start + timedelta(days=i)).isoformat() for i in range((today - start).days + 1)]
+        if period in ("last_7_days", "last_30_days"):
+            days = 7 if period == "last_7_days" else 30
+            return "by_day", [(today - timedelta(days=i)).isoformat() for i in range(days)]
+        if period == "this_month":
+            return "by_month", [today.strftime("%Y-%m")]
+        if period == "last_month":
+            return "by_month", [(today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")]
+        if period == "this_year":
+            return "by_month", [f"{today.year}-{month:02d}" for month in range(1, today.month + 1)]
+        try:
+            return "by_month", [datetime.strptime(period, "%Y-%m").strftime("%Y-%m")]
+        except ValueError:
+            return None
+
+    @staticmethod
+    def summarize(state, account_number: str, period: str, today: date = None):
+        """Returns {category: {"spent", "received", "count"}} for the period, or None for an unknown period."""
+        resolved = SpendingAnalytics.resolve_period(period, today)
+        if resolved is None:
+            return None
+        granularity, keys = resolved
+        buckets = SpendingAnalytics.ensure_rollups(state).get(account_number, {}).get(granularity, {})
+        summary = {}
+        for key in keys:
+            # list(): record_transaction may add a category to this bucket from another thread.
+            for category, totals in list(buckets.get(key, {}).items()):
+                combined = summary.setdefault(category, {"spent": 0.0, "received": 0.0, "count": 0})
+                combined["spent"] += totals["spent"]
+                combined["received"] += totals["received"]
+                combined["count"] += totals["count"]
+        return summary
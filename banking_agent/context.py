@@ -2,6 +2,9 @@
 
 from datetime import datetime, timedelta
 import random
+import threading
+
+from .analytics import SpendingAnalytics
 
 class OmnibankContext:
     """
@@ -108,6 +111,15 @@ class OmnibankContext:
         "TXN007": {"transaction_id": "TXN007", "account_number": "ACC778899001", "date": (datetime.now() - timedelta(days=10)).strftime('%Y-%m-%d'), "description": "Grocery Store", "amount": -250.75},
     }
 
+    # The mock stores below are shared by every session and tools run on a thread pool, so every
+    # read-modify-write of them (a balance change, a debit/credit pair, a new loan, a status change)
+    # holds this lock. Reentrant so a tool holding it can still call update_balance. Readers do not
+    # take it; they iterate over list(...) snapshots so a concurrent insert cannot break them.
+    STATE_LOCK = threading.RLock()
+
+    # Built once here and shared by every session alongside all_transactions; update_balance keeps it current.
+    MOCK_SPENDING_ROLLUPS = SpendingAnalytics.build_rollups(MOCK_TRANSACTIONS)
+
     CUSTOMER_BANKING_CONTEXT = {
         "is_banking_session": True,
         "all_customer_profiles": MOCK_CUSTOMER_PROFILES,
@@ -117,6 +129,7 @@ class OmnibankContext:
         "all_loan_products": MOCK_LOAN_PRODUCTS,
         "all_customer_loans": MOCK_CUSTOMER_LOANS,
         "all_transactions": MOCK_TRANSACTIONS,
+        "spending_rollups": MOCK_SPENDING_ROLLUPS,
         "current_customer_profile": None,
         "current_account_details": None,
         "current_card_details": None,
@@ -126,27 +139,30 @@ class OmnibankContext:
 
     @staticmethod
     def get_transactions_for_account(state, account_number: str, limit: int = 5):
-        transactions = state.get("all_transactions", {}).values()
+        transactions = list(state.get("all_transactions", {}).values())
         account_txns = [t for t in transactions if t.get("account_number") == account_number]
         sorted_txns = sorted(account_txns, key=lambda t: t['date'], reverse=True)
         return sorted_txns[:limit]
 
     @staticmethod
     def update_balance(state, account_number: str, amount_change: float):
-        accounts = state.get("all_accounts", {})
-        if account_number in accounts:
+        with OmnibankContext.STATE_LOCK:
+            accounts = state.get("all_accounts", {})
+            if account_number not in accounts:
+                return False
             accounts[account_number]["balance"] += amount_change
             new_txn_id = f"TXN-DYN-{random.randint(1000, 9999)}"
             description = f"Payment of ${-amount_change:,.2f}" if amount_change < 0 else f"Deposit of ${amount_change:,.2f}"
-            state["all_transactions"][new_txn_id] = {
+            new_txn = {
                 "transaction_id": new_txn_id,
                 "account_number": account_number,
                 "date": datetime.now().strftime('%Y-%m-%d'),
                 "description": description,
                 "amount": amount_change
             }
+            state["all_transactions"][new_txn_id] = new_txn
+            SpendingAnalytics.record_transaction(state, new_txn)
             return True
-        return False
 
     @staticmethod
     def get_loan_products_info(state):
@@ -155,7 +171,7 @@ class OmnibankContext:
     @staticmethod
     def get_customer_loan(state, customer_id: str):
         loans = state.get("all_customer_loans", {})
-        for _, loan in loans.items():
+        for _, loan in list(loans.items()):
             if loan.get("customer_id") == customer_id:
                 return loan.copy()
         return None
@@ -183,7 +199,7 @@ class OmnibankContext:
     @staticmethod
     def find_customer(state, first_name: str, last_name: str, date_of_birth: str, last_4_nin: str):
         profiles = state.get("all_customer_profiles", {})
-        for _, profile in profiles.items():
+        for _, profile in list(profiles.items()):
             if (first_name.lower() == profile["customer_first_name"].lower() and
                 last_name.lower() == profile["customer_last_name"].lower() and
                 date_of_birth == profile["date_of_birth"] and
@@ -194,24 +210,25 @@ class OmnibankContext:
     @staticmethod
     def get_account_by_customer_id(state, customer_id: str):
         accounts = state.get("all_accounts", {})
-        for _, account in accounts.items():
+        for _, account in list(accounts.items()):
             if account.get("customer_id") == customer_id:
                 return account.copy()
         return None
 
     @staticmethod
     def update_account_status(state, account_number: str, new_status: str):
-        if account_number in state["all_accounts"]:
-            state["all_accounts"][account_number]["status"] = new_status
-            if new_status == "active" and "lock_reason" in state["all_accounts"][account_number]:
-                del state["all_accounts"][account_number]["lock_reason"]
-            return True
-        return False
+        with OmnibankContext.STATE_LOCK:
+            if account_number in state["all_accounts"]:
+                state["all_accounts"][account_number]["status"] = new_status
+                if new_status == "active" and "lock_reason" in state["all_accounts"][account_number]:
+                    del state["all_accounts"][account_number]["lock_reason"]
+                return True
+            return False
 
     @staticmethod
     def get_card(state, last_4_digits: str, customer_id: str):
         cards = state.get("all_debit_cards", {})
-        for _, card in cards.items():
+        for _, card in list(cards.items()):
             if (card.get("last_4_digits") == last_4_digits and
                 card.get("customer_id") == customer_id):
                 return card.copy()
@@ -224,7 +241,8 @@ class OmnibankContext:
 
     @staticmethod
     def update_card_pin_status(state, card_id: str, new_pin_status: str):
-        if card_id in state["all_debit_cards"]:
-            state["all_debit_cards"][card_id]["pin_status"] = new_pin_status
-            return True
-        return False
+        with OmnibankContext.STATE_LOCK:
+            if card_id in state["all_debit_cards"]:
+                state["all_debit_cards"][card_id]["pin_status"] = new_pin_status
+                return True
+            return False
@@ -0,0 +1,204 @@
+# banking_agent/executor.py
+
+import asyncio
+import contextvars
+import functools
+import inspect
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+TOOL_MAX_WORKERS = int(os.getenv("TOOL_MAX_WORKERS", "32"))
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
+# Local stand-in for a slow core-banking backend: every blocking tool call sleeps this long first.
+SIMULATED_BACKEND_LATENCY_MS = float(os.getenv("SIMULATED_BACKEND_LATENCY_MS", "0"))
+# Maximum concurrent in-flight calls per backend; backends not listed use DEFAULT_BACKEND_LIMIT.
+BACKEND_LIMITS = {
+    "core_banking": 16,
+    "cards": 8,
+    "loans": 8,
+}
+DEFAULT_BACKEND_LIMIT = 16
+LATENCY_SAMPLES = 1024
+
+TIMEOUT_RESULT = {
+    "status": "timeout",
+    "message": "I'm sorry, our systems are taking longer than usual to respond. Please give me a moment and try again.",
+}
+# Returned instead of TIMEOUT_RESULT when a state-changing tool (wrap(..., mutating=True)) times out
+# after it started: the call may still complete, so the caller must not be invited to repeat it.
+PENDING_RESULT = {
+    "status": "pending",
+    "message": "That request is still being processed, so please don't repeat it. It will appear in your app and on your statement once it completes, or I can transfer you to a human representative to confirm it.",
+}
+ERROR_RESULT = {
+    "status": "error",
+    "message": "I'm sorry, something went wrong on our side. Please try again, or I can transfer you to a human representative.",
+}
+
+
+def with_simulated_latency(func, seconds: float):
+    """Wraps a blocking tool so it sleeps for `seconds` first, like a call to a slow remote backend."""
+    @functools.wraps(func)
+    def slow_func(*args, **kwargs):
+        time.sleep(seconds)
+        return func(*args, **kwargs)
+    return slow_func
+
+
+class ToolMetrics:
+    """Call, timeout and error counts plus a rolling window of latencies for one tool."""
+    def __init__(self):
+        self.calls = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+        return {
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class ToolExecutor:
+    """
+    Runs agent tools without blocking the event loop.
+
+    wrap() turns a tool function into an async function with the same name,
+    signature and docstring, so FunctionTool builds the same declaration for
+    it. Blocking tools run on a bounded thread pool (inside a copy of the
+    caller's context, so session_context is still visible); async tools are
+    awaited directly. Every call is capped per backend, bounded by a timeout
+    that returns a spoken-friendly fallback, and recorded in per-tool metrics.
+
+    A timed-out blocking call cannot be interrupted; its thread finishes in
+    the background and its result is discarded. It keeps its backend slot
+    until the thread is done, so a backend that is timing out never gets
+    more concurrent calls than its cap. Read-only tools may time out with
+    TIMEOUT_RESULT ("try again"). State-changing tools are wrapped with mutating=True: if they time out
+    after they started they return PENDING_RESULT, which tells the caller
+    the request may still go through and must not be repeated. A call that
+    timed out while still waiting for its backend slot never ran, so it
+    gets TIMEOUT_RESULT either way.
+    """
+    def __init__(self, max_workers: int = TOOL_MAX_WORKERS, timeout: float = TOOL_TIMEOUT_SECONDS, backend_limits: dict = None):
+        self.timeout = timeout
+        self.backend_limits = backend_limits if backend_limits is not None else BACKEND_LIMITS
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._semaphores = {}
+        self._metrics = {}
+
+    def _semaphore(self, backend: str) -> asyncio.Semaphore:
+        if backend not in self._semaphores:
+            self._semaphores[backend] = asyncio.Semaphore(self.backend_limits.get(backend, DEFAULT_BACKEND_LIMIT))
+        return self._semaphores[backend]
+
+    def wrap(self, func, backend: str = None, timeout: float = None, blocking: bool = True, mutating: bool = False):
+        """
+        Returns an async version of `func`. `backend` names the concurrency cap
+        to use. Pass blocking=False for trivial tools that never do I/O; they
+        run inline on the event loop and are only timed. Pass mutating=True for
+        tools that change state (payments, unlocks, PIN resets, applications)
+        so a timeout is never reported as safe to retry.
+        """
+        name = func.__name__
+        metrics = self._metrics.setdefault(name, ToolMetrics())
+        timeout = timeout if timeout is not None else self.timeout
+        is_async = inspect.iscoroutinefunction(func)
+        if blocking and not is_async and SIMULATED_BACKEND_LATENCY_MS:
+            func = with_simulated_latency(func, SIMULATED_BACKEND_LATENCY_MS / 1000)
+
+        async def call_inline(started: list, *args, **kwargs):
+            started.append(True)
+            if is_async:
+                return await func(*args, **kwargs)
+            return func(*args, **kwargs)
+
+        async def call_within_limit(started: list, *args, **kwargs):
+            if not blocking or is_async:
+                if not backend:
+                    return await call_inline(started, *args, **kwargs)
+                async with self._semaphore(backend):
+                    return await call_inline(started, *args, **kwargs)
+            return await self._call_in_thread(backend, started, func, *args, **kwargs)
+
+        @functools.wraps(func)
+        async def run_tool(*args, **kwargs):
+            metrics.calls += 1
+            metrics.in_flight += 1
+            started_at = time.perf_counter()
+            started = []
+            try:
+                # The timeout covers waiting for the backend's concurrency slot too.
+                return await asyncio.wait_for(call_within_limit(started, *args, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                metrics.timeouts += 1
+                if mutating and started:
+                    logger.warning(f"Tool {name} timed out after {timeout}s and may still complete")
+                    return dict(PENDING_RESULT)
+                logger.warning(f"Tool {name} timed out after {timeout}s")
+                return dict(TIMEOUT_RESULT)
+            except Exception as e:
+                metrics.errors += 1
+                logger.exception(f"Tool {name} failed: {e}")
+                return dict(ERROR_RESULT)
+            finally:
+                metrics.in_flight -= 1
+                metrics.latencies.append(time.perf_counter() - started_at)
+
+        return run_tool
+
+    async def _call_in_thread(self, backend: str, started: list, func, *args, **kwargs):
+        """
+        Runs `func` on the thread pool, holding the backend's slot until the
+        thread is done rather than until the caller stops waiting: a timeout
+        cancels the wait, but the backend call keeps running and must keep
+        counting against the cap.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(backend) if backend else None
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            context = contextvars.copy_context()
+            future = self._pool.submit(context.run, func, *args, **kwargs)
+        except BaseException:
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        started.append(True)
+        if semaphore is not None:
+            future.add_done_callback(lambda _: self._release_from_thread(loop, semaphore))
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _release_from_thread(loop, semaphore: asyncio.Semaphore):
+        try:
+            loop.call_soon_threadsafe(semaphore.release)
+        except RuntimeError:
+            # The loop has already shut down; nothing is waiting for the slot any more.
+            pass
+
+    def metrics(self) -> dict:
+        return {name: m.snapshot() for name, m in sorted(self._metrics.items())}
+
+
+tool_executor = ToolExecutor()
@@ -0,0 +1,107 @@
+# banking_agent/loan_engine.py
+
+import re
+from functools import lru_cache
+
+import numpy as np
+
+_APR_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+
+
+@lru_cache(maxsize=None)
+def parse_apr(interest_rate: str) -> float:
+    """Parses an APR string such as "5.5% APR" into an annual rate (0.055). Cached per string."""
+    match = _APR_PATTERN.search(interest_rate)
+    if not match:
+        raise ValueError(f"Unrecognised interest rate: {interest_rate!r}")
+    return float(match.group(1)) / 100
+
+
+def monthly_payments(apr: float, amounts, terms) -> np.ndarray:
+    """
+    Returns the fixed monthly payment for every amount x term combination as
+    an array of shape (len(amounts), len(terms)).
+    """
+    principal = np.asarray(amounts, dtype=np.float64)[:, None]
+    n = np.asarray(terms, dtype=np.float64)[None, :]
+    r = apr / 12
+    if r == 0:
+        return principal / n
+    return principal * r / (1 - (1 + r) ** -n)
+
+
+def amortization_schedules(apr: float, amounts, terms) -> dict:
+    """
+    Computes full amortization schedules for every amount x term combination.
+
+    Each array has shape (len(amounts), len(terms), max(terms)); month m of a
+    schedule is index m - 1, and months past a loan's term are NaN.
+    """
+    payment = monthly_payments(apr, amounts, terms)[:, :, None]
+    principal = np.asarray(amounts, dtype=np.float64)[:, None, None]
+    term = np.asarray(terms)[None, :, None]
+    month = np.arange(1, int(np.max(terms)) + 1)[None, None, :]
+    r = apr / 12
+    if r == 0:
+        balance = principal - payment * month
+        previous_balance = balance + payment
+    else:
+        growth = (1 + r) ** month
+        balance = principal * growth - payment * (growth - 1) / r
+        previous_balance = (balance + payment) / (1 + r)
+    interest = previous_balance * r
+    in_term = month <= term
+    balance = np.where(in_term, np.maximum(balance, 0.0), np.nan)
+    return {
+        "payment": np.where(in_term, payment, np.nan),
+        "interest": np.where(in_term, interest, np.nan),
+        "principal": np.where(in_term, payment - interest, np.nan),
+        "balance": balance,
+    }
+
+
+def first_year_split(product: dict, amount: float, term_months: int) -> dict:
+    """
+    Splits the first twelve payments of a loan (all of them for shorter
+    terms) into principal and interest. The term must be within the
+    product's max_term_months.
+    """
+    if not 0 < term_months <= product["max_term_months"]:
+        raise ValueError(f"Term of {term_months} months is outside 1-{product['max_term_months']} for {product['name']}")
+    schedule = amortization_schedules(parse_apr(product["interest_rate"]), [amount], [term_months])
+    months = min(12, term_months)
+    return {
+        "months": months,
+        "principal": round(float(schedule["principal"][0, 0, :months].sum()), 2),
+        "interest": round(float(schedule["interest"][0, 0, :months].sum()), 2),
+    }
+
+
+@lru_cache(maxsize=1024)
+def _cached_quote(interest_rate: str, max_term_months: int, amount: float, terms: tuple) -> tuple:
+    apr = parse_apr(interest_rate)
+    valid_terms = tuple(t for t in terms if 0 < t <= max_term_months)
+    if not valid_terms:
+        return apr, ()
+    payments = monthly_payments(apr, [amount], valid_terms)[0]
+    quotes = tuple(
+        (term, round(float(payment), 2), round(float(payment * term - amount), 2))
+        for term, payment in zip(valid_terms, payments)
+    )
+    return apr, quotes
+
+
+def quote(product: dict, amount: float, terms) -> dict:
+    """
+    Quotes a loan product for one amount over several terms. Terms beyond the
+    product's max_term_months are reported in `rejected_terms`. Recent quotes
+    are cached.
+    """
+    terms = tuple(sorted({int(t) for t in terms}))
+    apr, quotes = _cached_quote(product["interest_rate"], product["max_term_months"], float(amount), terms)
+    quoted_terms = {q[0] for q in quotes}
+    return {
+        "apr": apr,
+        "quotes": [{"term_months": t, "monthly_payment": p, "total_interest": i} for t, p, i in quotes],
+        "rejected_terms": [t for t in terms if t not in quoted_terms],
+    }
@@ -10,6 +10,8 @@ session_context = ContextVar('session_object', default=None)
 
 # The context import is now relative to this file's location.
 from .context import OmnibankContext
+from . import loan_engine
+from .analytics import CATEGORY_NAMES, PERIODS, SpendingAnalytics, normalize_category
 
 logger = logging.getLogger(__name__)
 
@@ -148,11 +150,13 @@ def reset_card_pin(card_id: str) -> dict:
     if not card or card.get("card_id") != card_id:
         return {"status": "mismatch", "message": "There was a mismatch. Please start the card lookup process again."}
 
-    if card.get("status") != "active":
-        return {"status": "card_inactive", "message": "This card is not active."}
+    with OmnibankContext.STATE_LOCK:
+        # current_card_details is a copy; check the status on the shared card being reset.
+        if state.get("all_debit_cards", {}).get(card_id, card).get("status") != "active":
+            return {"status": "card_inactive", "message": "This card is not active."}
+        OmnibankContext.update_card_pin_status(state, card_id, "set")
 
     new_pin = _generate_mock_pin()
-    OmnibankContext.update_card_pin_status(state, card_id, "set")
     return {"status": "success", "message": f"Your new temporary PIN is {new_pin}. Please change this at an ATM."}
 
 def get_loan_products() -> dict:
@@ -175,23 +179,58 @@ def get_loan_details() -> dict:
         }
     return {"status": "not_found", "message": "I couldn't find any existing loans for your profile."}
 
-def apply_for_loan(loan_type: str, amount: float) -> dict:
+def get_loan_quote(loan_type: str, amount: float, term_months: list[int]) -> dict:
+    """Quotes the monthly payment and total interest of a loan product for one amount over one or more terms (in months)."""
+    state = _get_and_init_state()
+    products = OmnibankContext.get_loan_products_info(state)
+    product = products.get(loan_type.replace(" ", "_").lower())
+    if not product:
+        return {"status": "not_found", "message": f"I'm sorry, we don't offer a '{loan_type}' at the moment."}
+    if amount <= 0:
+        return {"status": "invalid_amount", "message": "The loan amount must be positive."}
+
+    result = loan_engine.quote(product, amount, term_months)
+    if not result["quotes"]:
+        return {"status": "invalid_term", "message": f"The {product['name']} can be taken over at most {product['max_term_months']} months."}
+
+    quote_list = [
+        f"{q['term_months']} months: ${q['monthly_payment']:,.2f} per month, ${q['total_interest']:,.2f} total interest"
+        for q in result["quotes"]
+    ]
+    details = f"For a {product['name']} of ${amount:,.2f} at {product['interest_rate']}: " + "; ".join(quote_list) + "."
+    if result["rejected_terms"]:
+        details += f" The maximum term for this loan is {product['max_term_months']} months."
+    return {"status": "success", "details": details}
+
+def apply_for_loan(loan_type: str, amount: float, term_months: int = 0) -> dict:
     state = _get_and_init_state()
     if not state.get("is_identity_verified"):
         return {"status": "denied", "message": "Identity verification is required first."}
 
     customer_id = state.get("current_customer_profile", {}).get("customer_id")
-    if OmnibankContext.get_customer_loan(state, customer_id):
-        return {"status": "ineligible", "message": "Our records show you already have an active loan."}
-
-    new_loan = OmnibankContext.add_new_loan(state, customer_id, loan_type, amount)
+    products = OmnibankContext.get_loan_products_info(state)
+    product = products.get(loan_type.replace(" ", "_").lower())
+    if product and term_months > product["max_term_months"]:
+        return {"status": "invalid_term", "message": f"The {product['name']} can be taken over at most {product['max_term_months']} months."}
+
+    with OmnibankContext.STATE_LOCK:
+        if OmnibankContext.get_customer_loan(state, customer_id):
+            return {"status": "ineligible", "message": "Our records show you already have an active loan."}
+        new_loan = OmnibankContext.add_new_loan(state, customer_id, loan_type, amount)
     if not new_loan:
         return {"status": "error", "message": f"I'm sorry, we don't offer a '{loan_type}' at the moment."}
 
-    return {
-        "status": "success",
-        "message": f"Congratulations! Your application for a {loan_type} of ${amount:,.2f} has been approved. Your Loan ID is {new_loan['loan_id']}."
-    }
+    message = f"Congratulations! Your application for a {loan_type} of ${amount:,.2f} has been approved. Your Loan ID is {new_loan['loan_id']}."
+    if term_months > 0:
+        monthly_payment = loan_engine.quote(product, amount, [term_months])["quotes"][0]["monthly_payment"]
+        split = loan_engine.first_year_split(product, amount, term_months)
+        new_loan["term_months"] = term_months
+        new_loan["monthly_payment"] = monthly_payment
+        new_loan["first_year_principal"] = split["principal"]
+        new_loan["first_year_interest"] = split["interest"]
+        message += f" Your monthly payment over {term_months} months will be ${monthly_payment:,.2f}."
+        message += f" Over your first {split['months']} payments, ${split['principal']:,.2f} goes to principal and ${split['interest']:,.2f} to interest."
+    return {"status": "success", "message": message}
 
 def list_recent_transactions() -> dict:
     """Lists the most recent transactions for the customer's primary account. Requires identity verification."""
@@ -211,6 +250,52 @@ def list_recent_transactions() -> dict:
     details_list = [f"Date: {t['date']}, Description: {t['description']}, Amount: ${t['amount']:,.2f}" for t in transactions]
     return {"status": "success", "details": "\n".join(details_list)}
 
+def get_spending_summary(period: str) -> dict:
+    """Summarizes spending and income by category for a period: this_week, last_7_days, last_30_days, this_month, last_month, this_year, or a month as YYYY-MM. Requires identity verification."""
+    state = _get_and_init_state()
+    if not state.get("is_identity_verified"):
+        return {"status": "denied", "message": "Identity verification is required to view your spending."}
+
+    account = state.get("current_account_details", {})
+    if not account:
+        return {"status": "not_found", "message": "I couldn't find an account for your profile."}
+
+    summary = SpendingAnalytics.summarize(state, account['account_number'], period)
+    if summary is None:
+        return {"status": "invalid_period", "message": f"I can summarize spending for {', '.join(PERIODS)}, or a month such as 2025-01."}
+    if not summary:
+        return {"status": "success", "details": "You have no transactions in that period."}
+
+    total_spent = sum(t["spent"] for t in summary.values())
+    details_list = [
+        f"{category.capitalize()}: ${totals['spent']:,.2f} spent" + (f", ${totals['received']:,.2f} received" if totals["received"] else "")
+        for category, totals in sorted(summary.items(), key=lambda item: -item[1]["spent"])
+    ]
+    return {"status": "success", "details": f"Total spent: ${total_spent:,.2f}\n" + "\n".join(details_list)}
+
+def get_category_spending(category: str, period: str) -> dict:
+    """Returns how much was spent in one category (e.g. groceries, fuel, utilities, dining, shopping, transfers) over a period. Requires identity verification."""
+    state = _get_and_init_state()
+    if not state.get("is_identity_verified"):
+        return {"status": "denied", "message": "Identity verification is required to view your spending."}
+
+    account = state.get("current_account_details", {})
+    if not account:
+        return {"status": "not_found", "message": "I couldn't find an account for your profile."}
+
+    category_name = normalize_category(category)
+    if category_name is None:
+        return {"status": "invalid_category", "message": f"I can report spending for these categories: {', '.join(CATEGORY_NAMES)}."}
+
+    summary = SpendingAnalytics.summarize(state, account['account_number'], period)
+    if summary is None:
+        return {"status": "invalid_period", "message": f"I can summarize spending for {', '.join(PERIODS)}, or a month such as 2025-01."}
+
+    totals = summary.get(category_name)
+    if not totals:
+        return {"status": "success", "details": f"You have no {category_name} transactions in that period."}
+    return {"status": "success", "details": f"You spent ${totals['spent']:,.2f} on {category_name} across {totals['count']} transactions."}
+
 
 def make_payment(recipient_account_number: str, amount: float) -> dict:
     """Makes a payment from the customer's primary account to another account. Requires identity verification."""
@@ -225,13 +310,16 @@ def make_payment(recipient_account_number: str, amount: float) -> dict:
     # Basic validation
     if amount <= 0:
         return {"status": "invalid_amount", "message": "Payment amount must be positive."}
-    if sender_account['balance'] < amount:
-        return {"status": "insufficient_funds", "message": "You do not have sufficient funds to make this payment."}
     if recipient_account_number not in state.get("all_accounts", {}):
          return {"status": "recipient_not_found", "message": "The recipient account number does not seem to be valid."}
 
-    # Simulate the transaction
-    OmnibankContext.update_balance(state, sender_account['account_number'], -amount)
-    OmnibankContext.update_balance(state, recipient_account_number, amount)
+    # Simulate the transaction. The balance check, debit and credit happen under one lock.
+    with OmnibankContext.STATE_LOCK:
+        # current_account_details may be a copy; check the shared account the debit will come from.
+        sender_balance = state.get("all_accounts", {}).get(sender_account['account_number'], sender_account)['balance']
+        if sender_balance < amount:
+            return {"status": "insufficient_funds", "message": "You do not have sufficient funds to make this payment."}
+        OmnibankContext.update_balance(state, sender_account['account_number'], -amount)
+        OmnibankContext.update_balance(state, recipient_account_number, amount)
 
     return {"status": "success", "message": f"Payment of ${amount:,.2f} to account {recipient_account_number} was successful."}
@@ -0,0 +1,96 @@
+# benchmarks/lifecycle_soak.py
+#
+# Soak test for the connection lifecycle manager: runs 50k short calls through
+# LifecycleManager with a real InMemorySessionService and LiveRequestQueue and a
+# stand-in for runner.run_live(), ending each call the way a disconnect does.
+# Connection, stream and session counts must return to zero and RSS must stay
+# flat.
+#
+#   python benchmarks/lifecycle_soak.py [calls] [concurrency]
+
+import asyncio
+import gc
+import sys
+from pathlib import Path
+
+from google.adk.agents import LiveRequestQueue
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import lifecycle as lifecycle_module  # noqa: E402
+from lifecycle import LifecycleManager  # noqa: E402
+
+APP_NAME = "Omnibank Soak"
+CALLS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+REPORT_EVERY = CALLS // 10
+
+
+class Disconnected(Exception):
+    pass
+
+
+async def fake_run_live(live_request_queue: LiveRequestQueue):
+    """Stands in for runner.run_live(): yields an event per request until the queue is closed."""
+    while True:
+        request = await live_request_queue.get()
+        if request.close:
+            return
+        yield {"echo": request.blob}
+
+
+async def short_call(manager: LifecycleManager, session_service, n: int):
+    session_id = f"soak-{n}"
+    try:
+        async with manager.connection(session_id) as connection:
+            session = await session_service.create_session(app_name=APP_NAME, user_id=session_id, session_id=session_id)
+            queue = LiveRequestQueue()
+            live_events = fake_run_live(queue)
+            connection.attach(live_events=live_events, live_request_queue=queue, session=session)
+
+            async def agent_to_client():
+                async for _ in live_events:
+                    pass
+
+            async def client_to_agent():
+                for _ in range(3):
+                    queue.send_realtime(None)
+                    await asyncio.sleep(0)
+                raise Disconnected()
+
+            tasks = [connection.create_task(agent_to_client()), connection.create_task(client_to_agent())]
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done: task.result()
+    except Disconnected:
+        pass
+
+
+def report(label: str, manager: LifecycleManager, session_service):
+    gc.collect()
+    stats = manager.stats()
+    users = session_service.sessions.get(APP_NAME, {})
+    sessions = sum(len(user_sessions) for user_sessions in users.values())
+    rss = stats["rss_bytes"] / 2**20 if stats["rss_bytes"] else float("nan")
+    print(f"{label:>8}  active={stats['active_connections']:>4}  streams={stats['open_live_streams']:>4}  "
+          f"sessions_in_service={sessions:>5}  users_in_service={len(users):>5}  rss={rss:7.1f} MiB  closed={stats.get('total_closed', 0)}")
+
+
+async def main():
+    lifecycle_module.LEAK_GRACE_SECONDS = 0
+    session_service = InMemorySessionService()
+    manager = LifecycleManager(session_service, APP_NAME)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def bounded(n):
+        async with semaphore:
+            await short_call(manager, session_service, n)
+
+    report("start", manager, session_service)
+    for start in range(0, CALLS, REPORT_EVERY):
+        await asyncio.gather(*(bounded(n) for n in range(start, min(start + REPORT_EVERY, CALLS))))
+        report(f"{start + REPORT_EVERY:,}", manager, session_service)
+    print(f"leak check: {await manager.check_leaks()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
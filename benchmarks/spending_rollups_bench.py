@@ -0,0 +1,77 @@
+# benchmarks/spending_rollups_bench.py
+#
+# Builds a synthetic account with 100k transactions spread over three years
+# and compares answering "how much did I spend on groceries last month?" by
+# scanning all_transactions with reading the incremental rollups.
+#
+#   python benchmarks/spending_rollups_bench.py
+
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banking_agent.analytics import SpendingAnalytics, categorize  # noqa: E402
+from banking_agent.context import OmnibankContext  # noqa: E402
+
+ACCOUNT = "ACC-BENCH"
+TRANSACTIONS = 100_000
+DESCRIPTIONS = ["Grocery Store", "Gas Station", "Utility Bill Payment", "Coffee Shop", "Restaurant", "Online Store", "Salary Deposit"]
+TODAY = date.today()
+
+
+def synthetic_state() -> dict:
+    rng = random.Random(42)
+    transactions = {}
+    for i in range(TRANSACTIONS):
+        description = rng.choice(DESCRIPTIONS)
+        amount = round(rng.uniform(5, 300), 2) * (1 if "Deposit" in description else -1)
+        day = TODAY - timedelta(days=rng.randrange(3 * 365))
+        transactions[f"TXN{i}"] = {"transaction_id": f"TXN{i}", "account_number": ACCOUNT, "date": day.isoformat(), "description": description, "amount": amount}
+    return {"all_accounts": {ACCOUNT: {"account_number": ACCOUNT, "balance": 0.0}}, "all_transactions": transactions}
+
+
+def scan(state, category: str, month: str) -> float:
+    return sum(
+        -t["amount"] for t in state["all_transactions"].values()
+        if t["account_number"] == ACCOUNT and t["date"].startswith(month) and t["amount"] < 0 and categorize(t["description"]) == category
+    )
+
+
+def timed(fn, repeats: int = 10):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    state = synthetic_state()
+    _, (granularity, (last_month,)) = timed(lambda: SpendingAnalytics.resolve_period("last_month", TODAY), 1)
+
+    build, _ = timed(lambda: (state.pop("spending_rollups", None), SpendingAnalytics.ensure_rollups(state)), 3)
+    scan_time, scanned = timed(lambda: scan(state, "groceries", last_month))
+    query_time, summary = timed(lambda: SpendingAnalytics.summarize(state, ACCOUNT, "last_month", TODAY))
+    days_time, _ = timed(lambda: SpendingAnalytics.summarize(state, ACCOUNT, "last_30_days", TODAY))
+    assert abs(summary["groceries"]["spent"] - scanned) < 1e-6
+
+    updates = 10_000
+    started = time.perf_counter()
+    for _ in range(updates):
+        OmnibankContext.update_balance(state, ACCOUNT, -12.5)
+    update_time = (time.perf_counter() - started) / updates
+
+    print(f"{TRANSACTIONS:,} transactions, groceries in {last_month}: ${scanned:,.2f}")
+    print(f"initial rollup build      {build * 1000:8.2f} ms (once per transaction store)")
+    print(f"full scan query           {scan_time * 1000:8.2f} ms")
+    print(f"rollup query (month)      {query_time * 1e6:8.2f} us  ({scan_time / query_time:,.0f}x)")
+    print(f"rollup query (30 days)    {days_time * 1e6:8.2f} us")
+    print(f"update_balance + rollup   {update_time * 1e6:8.2f} us per transaction")
+
+
+if __name__ == "__main__":
+    main()
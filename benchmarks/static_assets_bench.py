@@ -0,0 +1,133 @@
+# benchmarks/static_assets_bench.py
+#
+# Compares the plain StaticFiles setup with the fingerprinted, precompressed
+# build for a cold client (empty cache) and a warm client (reconnecting with
+# everything from the previous load cached).
+#
+#   python benchmarks/static_assets_bench.py
+#
+# Bytes and request counts come from real requests against the ASGI apps.
+# Time to first interaction is modelled from them: each level of the load
+# waterfall (index.html -> app.js/style.css -> imported modules -> worklets)
+# costs one round trip plus its bytes over the link.
+
+import asyncio
+import gzip
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.responses import FileResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from static_assets import SOURCE_DIR, PrecompressedStaticFiles, build  # noqa: E402
+
+RTT_SECONDS = 0.150
+BANDWIDTH_BYTES_PER_SECOND = 1_600_000 / 8  # "Slow 4G"
+try:
+    import brotli
+    ACCEPT_ENCODING = "gzip, br"
+except ImportError:
+    brotli = None
+    ACCEPT_ENCODING = "gzip"
+REFERENCE = re.compile(r"""(?:src|href)="(/?static/[^"]+)"|from\s+"(\./[^"]+)"|new URL\(['"](\./[^'"]+)['"]""")
+
+
+def plain_app(directory: Path) -> Starlette:
+    async def root(request: Request):
+        return FileResponse(directory / "index.html")
+    return Starlette(routes=[Route("/", root), Mount("/static", StaticFiles(directory=directory))])
+
+
+def precompressed_app(directory: Path) -> Starlette:
+    static_files = PrecompressedStaticFiles(directory=directory)
+
+    async def root(request: Request):
+        index_path = directory / "index.html"
+        return static_files.file_response(index_path, os.stat(index_path), request.scope)
+    return Starlette(routes=[Route("/", root), Mount("/static", static_files)])
+
+
+class Client:
+    """A minimal browser cache: honours immutable Cache-Control and revalidates everything else."""
+    def __init__(self, app):
+        self.http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        self.cache = {}
+
+    async def fetch(self, url: str, stats: dict):
+        cached = self.cache.get(url)
+        if cached and "immutable" in cached["cache_control"]:
+            return cached["body"]
+        headers = {"Accept-Encoding": ACCEPT_ENCODING}
+        if cached and cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        # Read the raw body so the byte count is what went over the wire.
+        async with self.http.stream("GET", url, headers=headers) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        stats["requests"] += 1
+        stats["bytes"] += len(raw)
+        if response.status_code == 304:
+            return cached["body"]
+        encoding = response.headers.get("content-encoding")
+        body = gzip.decompress(raw) if encoding == "gzip" else brotli.decompress(raw) if encoding == "br" else raw
+        self.cache[url] = {
+            "body": body.decode("utf-8"),
+            "etag": response.headers.get("etag"),
+            "cache_control": response.headers.get("cache-control", ""),
+        }
+        return self.cache[url]["body"]
+
+    async def load_page(self) -> dict:
+        stats = {"requests": 0, "bytes": 0, "levels": []}
+        level = ["/"]
+        seen = set(level)
+        while level:
+            requests_before, bytes_before = stats["requests"], stats["bytes"]
+            bodies = [await self.fetch(url, stats) for url in level]
+            stats["levels"].append((stats["requests"] - requests_before, stats["bytes"] - bytes_before))
+            next_level = []
+            for url, body in zip(level, bodies):
+                for match in REFERENCE.finditer(body):
+                    ref = next(g for g in match.groups() if g)
+                    if ref.startswith("./"):
+                        ref = url.rsplit("/", 1)[0] + ref[1:]
+                    elif not ref.startswith("/"):
+                        ref = "/" + ref
+                    if ref not in seen:
+                        seen.add(ref)
+                        next_level.append(ref)
+            level = next_level
+        stats["tti_seconds"] = sum(
+            (RTT_SECONDS if level_requests else 0) + level_bytes / BANDWIDTH_BYTES_PER_SECOND
+            for level_requests, level_bytes in stats["levels"]
+        )
+        return stats
+
+
+async def run(label: str, app):
+    client = Client(app)
+    for name in ("cold", "warm"):
+        started = time.perf_counter()
+        stats = await client.load_page()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<14} {name:<5} requests={stats['requests']:>2}  bytes={stats['bytes']:>7,}  "
+              f"modelled_tti={stats['tti_seconds'] * 1000:>6.0f} ms  server_time={elapsed * 1000:.1f} ms")
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as build_dir:
+        build(SOURCE_DIR, Path(build_dir))
+        await run("plain", plain_app(SOURCE_DIR))
+        await run("precompressed", precompressed_app(Path(build_dir)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
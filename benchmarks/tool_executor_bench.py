@@ -0,0 +1,78 @@
+# benchmarks/tool_executor_bench.py
+#
+# Shows that event-loop lag stays flat when slow tools go through the
+# ToolExecutor. A heartbeat task measures how late each 10 ms tick fires
+# while many concurrent "callers" invoke a tool backed by a slow, blocking
+# stand-in for the core-banking system. Inline calls block the loop for the
+# whole backend latency; executor calls do not.
+#
+#   python benchmarks/tool_executor_bench.py
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banking_agent.executor import ToolExecutor, with_simulated_latency  # noqa: E402
+
+CALLERS = 50
+CALLS_PER_CALLER = 4
+BACKEND_LATENCY = 0.05
+TICK = 0.010
+
+
+def get_account_balance() -> dict:
+    return {"status": "success", "message": "Your current balance is $25,000.50."}
+
+
+slow_get_account_balance = with_simulated_latency(get_account_balance, BACKEND_LATENCY)
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK
+        await asyncio.sleep(TICK)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run(label: str, call_tool):
+    lags, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(heartbeat(lags, stop))
+
+    async def caller():
+        for _ in range(CALLS_PER_CALLER):
+            await call_tool()
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CALLERS)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    lags.sort()
+    print(f"{label:<28} wall {elapsed:6.2f} s  loop lag p50 {statistics.median(lags) * 1000:7.1f} ms  "
+          f"p99 {lags[int(0.99 * (len(lags) - 1))] * 1000:7.1f} ms  max {lags[-1] * 1000:7.1f} ms")
+
+
+async def main():
+    print(f"{CALLERS} callers x {CALLS_PER_CALLER} calls, {BACKEND_LATENCY * 1000:.0f} ms blocking backend")
+
+    async def inline():
+        return slow_get_account_balance()
+    await run("inline (before)", inline)
+
+    executor = ToolExecutor(max_workers=32, timeout=5.0, backend_limits={"core_banking": 16})
+    wrapped = executor.wrap(slow_get_account_balance, backend="core_banking")
+    await run("executor, cap 16", wrapped)
+    print(f"metrics: {executor.metrics()}")
+
+    executor = ToolExecutor(max_workers=32, timeout=0.02)
+    wrapped = executor.wrap(slow_get_account_balance, backend="core_banking")
+    result = await wrapped()
+    print(f"timeout fallback: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+# benchmarks/transcript_store_bench.py
+#
+# Measures transcript indexing throughput for 1,000 concurrent calls: each
+# session streams fragmented caller and agent speech for 20 turns, and we
+# time how long the event-loop side (aggregation + enqueue) takes and how
+# long the writer thread needs to commit and index everything.
+#
+#   python benchmarks/transcript_store_bench.py [sessions] [turns]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from transcripts import TranscriptStore  # noqa: E402
+
+SESSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+TURNS = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TranscriptStore(str(Path(tmp) / "transcripts.db"))
+        store.start()
+        sessions = [store.session(f"bench-{i}") for i in range(SESSIONS)]
+
+        started = time.perf_counter()
+        for _ in range(TURNS):
+            for transcript in sessions:
+                transcript.add_input("I need to ", "I need to ")
+                transcript.add_input("unlock my account", "unlock my account")
+                transcript.add_agent("Sure, I can ", partial=True)
+                transcript.add_agent("help with that.", partial=True)
+                transcript.end_turn()
+        enqueued = time.perf_counter() - started
+        store.close()
+        drained = time.perf_counter() - started
+
+        utterances = SESSIONS * TURNS * 2
+        matches = len(store.search('"unlock my account"', limit=utterances))
+        print(f"{SESSIONS:,} sessions x {TURNS} turns = {utterances:,} utterances")
+        print(f"event-loop side (aggregate + enqueue)  {enqueued:6.2f} s")
+        print(f"written and indexed                    {drained:6.2f} s  ({utterances / drained:,.0f} utterances/s)")
+        print(f"search hits {matches:,}, dropped {store.dropped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# lifecycle.py
+
+import asyncio
+import logging
+import os
+import time
+import weakref
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+
+from google.adk.sessions import InMemorySessionService
+
+logger = logging.getLogger(__name__)
+
+# How often the leak detector runs, and how long a closed resource may linger before it counts as leaked.
+LEAK_CHECK_INTERVAL = float(os.getenv("LEAK_CHECK_INTERVAL_SECONDS", "30"))
+LEAK_GRACE_SECONDS = float(os.getenv("LEAK_GRACE_SECONDS", "10"))
+STREAM_CLOSE_TIMEOUT = 5.0
+# Number of recently closed connections the leak detector keeps watching.
+RECENTLY_CLOSED = 10_000
+
+
+def _rss_bytes():
+    """Current resident set size on Linux, None elsewhere."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _weak(obj):
+    try:
+        return weakref.ref(obj)
+    except TypeError:
+        return None
+
+
+class Connection:
+    """Everything owned by one caller's WebSocket connection, released by LifecycleManager.close()."""
+    def __init__(self, session_id: str, websocket=None):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.opened_at = time.monotonic()
+        self.tasks = []
+        self.live_events = None
+        self.live_request_queue = None
+        self.session = None
+        self.closing = None
+
+    def attach(self, live_events=None, live_request_queue=None, session=None):
+        self.live_events = live_events
+        self.live_request_queue = live_request_queue
+        self.session = session
+
+    def create_task(self, coro, name: str = None) -> asyncio.Task:
+        task = asyncio.create_task(coro, name=name)
+        self.tasks.append(task)
+        return task
+
+
+class LifecycleManager:
+    """
+    Owns every per-connection resource: the handler tasks, the
+    LiveRequestQueue, the live_events async generator and the ADK session.
+
+    Teardown always runs in the same order, whether the caller disconnected,
+    a handler failed or the endpoint was cancelled:
+
+        1. cancel and await the handler tasks
+        2. close the LiveRequestQueue
+        3. aclose() the live_events generator (ends the upstream live stream)
+        4. delete the session from the session service
+
+    A periodic leak detector tears down connections whose socket is gone but
+    which were never closed, deletes sessions that survived their connection,
+    and counts closed streams and queues that are still referenced.
+    """
+    def __init__(self, session_service, app_name: str):
+        self.session_service = session_service
+        self.app_name = app_name
+        self.connections = {}
+        self.totals = Counter()
+        self._recently_closed = deque(maxlen=RECENTLY_CLOSED)
+        self._leaked_objects = 0
+        self._detector = None
+
+    @asynccontextmanager
+    async def connection(self, session_id: str, websocket=None):
+        connection = Connection(session_id, websocket)
+        self.connections[id(connection)] = connection
+        self.totals["opened"] += 1
+        try:
+            yield connection
+        finally:
+            # Shield the teardown so a cancelled endpoint still releases everything.
+            await asyncio.shield(self.close(connection))
+
+    async def close(self, connection: Connection):
+        if connection.closing is None:
+            connection.closing = asyncio.ensure_future(self._teardown(connection))
+        await connection.closing
+
+    async def _teardown(self, connection: Connection):
+        session_id = connection.session_id
+        for task in connection.tasks:
+            task.cancel()
+        if connection.tasks:
+            await asyncio.gather(*connection.tasks, return_exceptions=True)
+
+        if connection.live_request_queue is not None:
+            self._step(session_id, "close live request queue", connection.live_request_queue.close)
+
+        if connection.live_events is not None:
+            try:
+                await asyncio.wait_for(connection.live_events.aclose(), STREAM_CLOSE_TIMEOUT)
+            except Exception as e:
+                self.totals["teardown_errors"] += 1
+                logger.warning(f"Failed to close live stream for session {session_id}: {e!r}")
+
+        if connection.session is not None:
+            await self._delete_session(session_id)
+
+        self._recently_closed.append({
+            "session_id": session_id,
+            "closed_at": time.monotonic(),
+            "has_session": connection.session is not None,
+            "refs": [ref for ref in (_weak(connection.live_events), _weak(connection.live_request_queue)) if ref],
+        })
+        connection.tasks = []
+        connection.attach()
+        connection.websocket = None
+        self.connections.pop(id(connection), None)
+        self.totals["closed"] += 1
+
+    def _step(self, session_id: str, description: str, func):
+        try:
+            func()
+        except Exception as e:
+            self.totals["teardown_errors"] += 1
+            logger.warning(f"Failed to {description} for session {session_id}: {e!r}")
+
+    async def _delete_session(self, session_id: str):
+        try:
+            await self.session_service.delete_session(app_name=self.app_name, user_id=session_id, session_id=session_id)
+            self._prune_in_memory_user(session_id)
+        except Exception as e:
+            self.totals["teardown_errors"] += 1
+            logger.warning(f"Failed to delete session {session_id}: {e!r}")
+
+    def _prune_in_memory_user(self, user_id: str):
+        """
+        InMemorySessionService keeps a per-user sessions dict and user-scoped
+        state after the user's last session is deleted. Every caller is its own
+        user here (user_id == session_id), so once that user has no sessions
+        left both are dropped to keep memory flat. Other session services
+        manage their own storage and are left alone.
+        """
+        if not isinstance(self.session_service, InMemorySessionService):
+            return
+        users = self.session_service.sessions.get(self.app_name, {})
+        if users.get(user_id):
+            return
+        users.pop(user_id, None)
+        self.session_service.user_state.get(self.app_name, {}).pop(user_id, None)
+
+    # --- Leak Detection ---
+    async def check_leaks(self) -> dict:
+        """Runs one leak-detection pass and returns what it found."""
+        now = time.monotonic()
+        found = Counter()
+
+        for connection in list(self.connections.values()):
+            if connection.closing is None and self._socket_gone(connection) and now - connection.opened_at > LEAK_GRACE_SECONDS:
+                found["orphaned_connections"] += 1
+                logger.warning(f"Tearing down orphaned connection for session {connection.session_id}")
+                await self.close(connection)
+
+        active_sessions = {c.session_id for c in self.connections.values()}
+        leaked_objects = 0
+        still_watching = deque(maxlen=RECENTLY_CLOSED)
+        for closed in self._recently_closed:
+            if now - closed["closed_at"] < LEAK_GRACE_SECONDS:
+                still_watching.append(closed)
+                continue
+            leaked_objects += sum(1 for ref in closed["refs"] if ref() is not None)
+            if closed["has_session"] and closed["session_id"] not in active_sessions:
+                session = await self.session_service.get_session(app_name=self.app_name, user_id=closed["session_id"], session_id=closed["session_id"])
+                if session is not None:
+                    found["orphaned_sessions"] += 1
+                    await self._delete_session(closed["session_id"])
+        self._recently_closed = still_watching
+        self._leaked_objects = leaked_objects
+
+        self.totals.update(found)
+        if found or leaked_objects:
+            logger.warning(f"Leak check: {dict(found)}, closed streams/queues still referenced: {leaked_objects}")
+        return {**found, "leaked_objects": leaked_objects}
+
+    @staticmethod
+    def _socket_gone(connection: Connection) -> bool:
+        state = getattr(connection.websocket, "client_state", None)
+        return state is not None and state.name == "DISCONNECTED"
+
+    async def _run_detector(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_leaks()
+            except Exception as e:
+                logger.exception(f"Leak check failed: {e}")
+
+    def start(self, interval: float = LEAK_CHECK_INTERVAL):
+        if self._detector is None:
+            self._detector = asyncio.create_task(self._run_detector(interval), name="lifecycle_leak_detector")
+
+    async def stop(self):
+        if self._detector is not None:
+            self._detector.cancel()
+            await asyncio.gather(self._detector, return_exceptions=True)
+            self._detector = None
+        await asyncio.gather(*(self.close(c) for c in list(self.connections.values())), return_exceptions=True)
+
+    def stats(self) -> dict:
+        active = list(self.connections.values())
+        return {
+            "active_connections": len(active),
+            "open_live_streams": sum(1 for c in active if c.live_events is not None),
+            "open_request_queues": sum(1 for c in active if c.live_request_queue is not None),
+            "open_sessions": sum(1 for c in active if c.session is not None),
+            "handler_tasks": sum(1 for c in active for t in c.tasks if not t.done()),
+            "leaked_objects": self._leaked_objects,
+            "rss_bytes": _rss_bytes(),
+            **{f"total_{key}": value for key, value in sorted(self.totals.items())},
+        }
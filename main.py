@@ -4,7 +4,8 @@ import os
 import json
 import asyncio
 import base64
-from pathlib import Path
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
 from google.genai.types import Part, Content, Blob
@@ -17,21 +18,34 @@ from google.adk.agents import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.sessions.in_memory_session_service import InMemorySessionService
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+import secrets
+import sqlite3
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from banking_agent.agent import root_agent
 from banking_agent.tools import session_context
+from banking_agent.executor import tool_executor
+from profiling import profiler
+from supervisor_bus import event_bus
+from transcripts import transcript_store
+from static_assets import PrecompressedStaticFiles, asset_dir
+from lifecycle import LifecycleManager
 
 from google.cloud import translate_v2 as translate
 
 load_dotenv()
 
 APP_NAME = "Omnibank Assistant"
-STATIC_DIR = Path("frontend/static")
+# Serves frontend/dist when the asset build has been run (see static_assets.py), frontend/static otherwise.
+STATIC_DIR = asset_dir()
+# The /admin endpoints are disabled unless this token is configured.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+SUPERVISOR_AUTH_TIMEOUT = 5.0
 session_service = InMemorySessionService()
+lifecycle = LifecycleManager(session_service, APP_NAME)
 
 try:
     translate_client = translate.Client()
@@ -89,13 +103,22 @@ async def start_agent_session(session_id: str, language_code: str):
     )
     return live_events, live_request_queue, session
 
-async def agent_to_client_messaging(websocket: WebSocket, live_events, dev_mode: bool = False):
+async def agent_to_client_messaging(websocket: WebSocket, live_events, session_id: str, dev_mode: bool = False):
+    transcript = transcript_store.session(session_id)
+    try:
+        await _relay_agent_events(websocket, live_events, session_id, transcript, dev_mode)
+    finally:
+        transcript.end_turn()
+
+async def _relay_agent_events(websocket: WebSocket, live_events, session_id: str, transcript, dev_mode: bool):
     async for event in live_events:
         if event.turn_complete or event.interrupted:
+            transcript.end_turn()
             await websocket.send_text(json.dumps({
                 "turn_complete": event.turn_complete,
                 "interrupted": event.interrupted
             }))
+            event_bus.publish(session_id, "turn_complete", {"turn_complete": event.turn_complete, "interrupted": event.interrupted})
             continue
 
         if event.content and event.content.parts:
@@ -111,6 +134,7 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events, dev_mode:
                            "mime_type": "text/input_transcription",
                            "data": native_text
                        }))
+                       event_bus.publish(session_id, "text/input_transcription", native_text)
                        translated_list = []
                        translated_eng_text = translate_text(native_text)
                        translated_list.append(translated_eng_text)
@@ -120,6 +144,8 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events, dev_mode:
                            "mime_type": "text/input_translated",
                            "data": all_translations_str
                        }))
+                       event_bus.publish(session_id, "text/input_translated", all_translations_str)
+                       transcript.add_input(native_text, all_translations_str)
                     # If the author is the MODEL, it's the agent's speech
                     elif author == 'model':
                         # Use the event.partial flag to distinguish live transcript from final text
@@ -128,11 +154,15 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events, dev_mode:
                                "mime_type": "text/transcription",
                                "data": part.text
                            }))
+                           event_bus.publish(session_id, "text/transcription", part.text)
+                           transcript.add_agent(part.text, partial=True)
                         else:
                            await websocket.send_text(json.dumps({
                                "mime_type": "text/plain",
                                "data": part.text
                            }))
+                           event_bus.publish(session_id, "text/plain", part.text)
+                           transcript.add_agent(part.text, partial=False)
 
                 # Handle audio data from the agent (this remains the same)
                 elif part.inline_data and part.inline_data.mime_type.startswith("audio/"):
@@ -141,13 +171,19 @@ async def agent_to_client_messaging(websocket: WebSocket, live_events, dev_mode:
                        "data": base64.b64encode(part.inline_data.data).decode("ascii")
                    }))
 
-                if dev_mode:
-                    if part.function_call:
-                        args_dict = {key: value for key, value in part.function_call.args.items()}
-                        await websocket.send_text(json.dumps({"mime_type": "tool_call", "data": {"name": part.function_call.name, "args": args_dict}}))
-                    elif part.function_response:
-                        response_dict = {key: value for key, value in part.function_response.response.items()} if part.function_response.response else {}
-                        await websocket.send_text(json.dumps({"mime_type": "tool_result", "data": {"name": part.function_response.name, "response": response_dict}}))
+                # Tool frames go to the caller only in dev mode, and to any supervisor watching this session.
+                if part.function_call and (dev_mode or event_bus.wants(session_id, "tool_call")):
+                    args_dict = {key: value for key, value in part.function_call.args.items()}
+                    tool_call = {"name": part.function_call.name, "args": args_dict}
+                    if dev_mode:
+                        await websocket.send_text(json.dumps({"mime_type": "tool_call", "data": tool_call}))
+                    event_bus.publish(session_id, "tool_call", tool_call)
+                elif part.function_response and (dev_mode or event_bus.wants(session_id, "tool_result")):
+                    response_dict = {key: value for key, value in part.function_response.response.items()} if part.function_response.response else {}
+                    tool_result = {"name": part.function_response.name, "response": response_dict}
+                    if dev_mode:
+                        await websocket.send_text(json.dumps({"mime_type": "tool_result", "data": tool_result}))
+                    event_bus.publish(session_id, "tool_result", tool_result)
 
 async def client_to_agent_messaging(websocket: WebSocket, live_request_queue: LiveRequestQueue):
     while True:
@@ -170,25 +206,146 @@ app.add_middleware(CORSMiddleware,
                     allow_methods=["*"], 
                     allow_headers=["*"])
 
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+@app.on_event("startup")
+async def start_background_services():
+    transcript_store.start()
+    lifecycle.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await lifecycle.stop()
+    await asyncio.to_thread(transcript_store.close)
+
+static_files = PrecompressedStaticFiles(directory=STATIC_DIR)
+app.mount("/static", static_files, name="static")
 
 @app.get("/")
-async def root():
-    return FileResponse(os.path.join(STATIC_DIR, "index.html"))
+async def root(request: Request):
+    index_path = os.path.join(STATIC_DIR, "index.html")
+    return static_files.file_response(index_path, os.stat(index_path), request.scope)
+
+def require_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    if not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+@app.get("/admin/profile")
+async def profile_event_loop(seconds: float = 10.0, interval_ms: float = 5.0, slow_callback_ms: float = 100.0, format: str = "collapsed", x_admin_token: Optional[str] = Header(default=None)):
+    """Samples the event loop for `seconds` and returns collapsed stacks (or a JSON summary with format=json)."""
+    require_admin(x_admin_token)
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="A profiling run is already in progress.")
+    result = await profiler.profile(seconds, interval_ms / 1000, slow_callback_ms / 1000)
+    if format == "json":
+        return result
+    return PlainTextResponse(result["collapsed"])
+
+@app.get("/admin/tool-metrics")
+async def tool_metrics(x_admin_token: Optional[str] = Header(default=None)):
+    """Per-tool call counts, timeouts, errors and latency percentiles."""
+    require_admin(x_admin_token)
+    return tool_executor.metrics()
+
+@app.get("/admin/lifecycle")
+async def lifecycle_stats(x_admin_token: Optional[str] = Header(default=None)):
+    """Live connection, stream, queue and session counts, leak-detector totals and process RSS."""
+    require_admin(x_admin_token)
+    return lifecycle.stats()
+
+@app.get("/admin/transcripts/search")
+async def search_transcripts(q: str, days: Optional[float] = None, session_id: Optional[str] = None, limit: int = 50, x_admin_token: Optional[str] = Header(default=None)):
+    """Full-text search over stored utterances, e.g. q="unlock account"&days=7."""
+    require_admin(x_admin_token)
+    since = time.time() - days * 86400 if days else None
+    try:
+        results = await asyncio.to_thread(transcript_store.search, q, since, session_id, min(limit, 500))
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+    return {"results": results, "store": transcript_store.stats()}
+
+@app.websocket("/admin/ws/supervisor")
+async def supervisor_endpoint(websocket: WebSocket, session_ids: Optional[str] = None, types: Optional[str] = None, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Streams live session events to a supervisor dashboard. `session_ids` and
+    `types` are comma-separated filters; the supervisor may later send
+    {"session_ids": [...]} to change which sessions it is watching.
+
+    Authenticate with the X-Admin-Token header or, for browsers that cannot
+    set WebSocket headers, with {"token": "..."} as the first message. The
+    token is never accepted in the URL, which ends up in access logs.
+    """
+    if not ADMIN_TOKEN:
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    token = x_admin_token
+    if not token:
+        try:
+            first_message = json.loads(await asyncio.wait_for(websocket.receive_text(), SUPERVISOR_AUTH_TIMEOUT))
+            token = first_message.get("token") if isinstance(first_message, dict) else None
+        except (asyncio.TimeoutError, ValueError, WebSocketDisconnect):
+            token = None
+    if not isinstance(token, str) or not secrets.compare_digest(token, ADMIN_TOKEN):
+        await websocket.close(code=1008)
+        return
+
+    subscriber = event_bus.subscribe(
+        session_ids=session_ids.split(",") if session_ids else None,
+        event_types=types.split(",") if types else None,
+    )
+    print(f"Supervisor connected. Sessions: {session_ids or 'all'}, Types: {types or 'all'}")
+
+    async def forward_events():
+        async for message in subscriber:
+            await websocket.send_text(message)
+
+    async def receive_filters():
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if not isinstance(message, dict) or "session_ids" not in message:
+                continue
+            requested = message["session_ids"]
+            if requested is None or requested == []:
+                subscriber.session_ids = None
+            elif isinstance(requested, list) and all(isinstance(s, str) for s in requested):
+                subscriber.session_ids = set(requested)
+            else:
+                await websocket.send_text(json.dumps({"type": "error", "data": "session_ids must be a list of strings."}))
+
+    tasks = [asyncio.create_task(forward_events()), asyncio.create_task(receive_filters())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks: task.cancel()
+        event_bus.unsubscribe(subscriber)
+        print(f"Supervisor disconnected. Dropped events: {subscriber.dropped}")
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str, lang: str = "en-US", is_audio: bool = False, dev_mode: bool = False):
     await websocket.accept()
     print(f"Client #{session_id} connected. Audio: {is_audio}, Lang: {lang}, Dev Mode: {dev_mode}")
+    # Task names are "<handler>:<session_id>" so the profiler can attribute samples.
+    asyncio.current_task().set_name(f"websocket_endpoint:{session_id}")
     async def run_tasks_with_context():
-        live_events, live_request_queue, session_object = await start_agent_session(session_id, lang)
-        session_context.set(session_object)
-        tasks = [
-            asyncio.create_task(agent_to_client_messaging(websocket, live_events, dev_mode)),
-            asyncio.create_task(client_to_agent_messaging(websocket, live_request_queue)),
-        ]
-        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-        for task in pending: task.cancel()
+        # The lifecycle manager tears down the tasks, live stream, queue and session however this block exits.
+        async with lifecycle.connection(session_id, websocket) as connection:
+            live_events, live_request_queue, session_object = await start_agent_session(session_id, lang)
+            connection.attach(live_events=live_events, live_request_queue=live_request_queue, session=session_object)
+            session_context.set(session_object)
+            tasks = [
+                connection.create_task(agent_to_client_messaging(websocket, live_events, session_id, dev_mode), name=f"agent_to_client_messaging:{session_id}"),
+                connection.create_task(client_to_agent_messaging(websocket, live_request_queue), name=f"client_to_agent_messaging:{session_id}"),
+            ]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            # Re-raise whatever ended the first task (e.g. WebSocketDisconnect) so it is reported below.
+            # A cancelled task has no exception to report; teardown cancels the rest.
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
     try:
         await run_tasks_with_context()
     except WebSocketDisconnect:
@@ -0,0 +1,265 @@
+# profiling.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+# Hard upper bound so a forgotten request can never leave the sampler running.
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL_SECONDS = 0.001
+MAX_STACK_DEPTH = 128
+
+
+def _task_labels(task) -> tuple:
+    """
+    Splits a task name of the form "<handler>:<session_id>" (see main.py)
+    into its handler and session parts. Unnamed tasks fall back to their
+    coroutine name so they still show up as a distinct frame.
+    """
+    if task is None:
+        return "event_loop", None
+    name = task.get_name()
+    if ":" in name:
+        handler, session_id = name.split(":", 1)
+        return handler, session_id
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", name), None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> list:
+    """Returns the stack for `frame` as a root-first list of frame labels."""
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+# --- Slow Callback Detector ---
+class SlowCallbackDetector:
+    """
+    Times every event-loop step (asyncio Handle) and logs the ones that take
+    longer than `threshold` seconds. The timing wrapper is only installed
+    between install() and uninstall(), so there is no cost while idle.
+
+    Only the stock asyncio loops run their callbacks through Handle._run;
+    uvloop (which uvicorn picks by default when it is installed) does not, so
+    install() refuses such loops and the profiler falls back to
+    LoopStallDetector.
+    """
+    def __init__(self, threshold: float = 0.1):
+        self.threshold = threshold
+        self.slow_steps = []
+        self._original_run = None
+
+    @property
+    def installed(self) -> bool:
+        return self._original_run is not None
+
+    @staticmethod
+    def supports(loop) -> bool:
+        return isinstance(loop, asyncio.BaseEventLoop)
+
+    def install(self, loop) -> bool:
+        """Installs the timing wrapper; returns False if `loop` does not run callbacks through Handle."""
+        if self.installed:
+            return True
+        if not self.supports(loop):
+            return False
+        original_run = asyncio.events.Handle._run
+        detector = self
+
+        def _timed_run(handle):
+            start = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed >= detector.threshold:
+                    detector._record(handle, elapsed)
+
+        self._original_run = original_run
+        asyncio.events.Handle._run = _timed_run
+        return True
+
+    def uninstall(self):
+        if not self.installed:
+            return
+        asyncio.events.Handle._run = self._original_run
+        self._original_run = None
+
+    def _record(self, handle, elapsed: float):
+        callback = getattr(handle, "_callback", None)
+        task = getattr(callback, "__self__", None)
+        if isinstance(task, asyncio.Task):
+            handler, session_id = _task_labels(task)
+        else:
+            handler, session_id = getattr(callback, "__qualname__", repr(callback)), None
+        step = {"handler": handler, "session_id": session_id, "duration_ms": round(elapsed * 1000, 2)}
+        self.slow_steps.append(step)
+        logger.warning(f"Slow event-loop step: {handler} (session: {session_id}) took {step['duration_ms']} ms")
+
+
+class LoopStallDetector:
+    """
+    Loop-agnostic slow-step detection: a heartbeat task on the loop stamps
+    `last_tick` every `tick` seconds, and the profiler's sampler thread calls
+    check() on every wake. When the heartbeat is late by more than
+    `threshold`, the loop is stuck in one step; the stall is recorded with the
+    running task and the loop thread's stack, and its duration is extended
+    until the heartbeat fires again.
+    """
+    def __init__(self, threshold: float = 0.1):
+        self.threshold = threshold
+        self.tick = max(threshold / 4, MIN_INTERVAL_SECONDS)
+        self.slow_steps = []
+        self.last_tick = time.perf_counter()
+        self._stalled_since_tick = None
+
+    async def heartbeat(self):
+        while True:
+            self.last_tick = time.perf_counter()
+            await asyncio.sleep(self.tick)
+
+    def check(self, loop, frame):
+        last_tick = self.last_tick
+        blocked = time.perf_counter() - last_tick - self.tick
+        if blocked < self.threshold:
+            return
+        if self._stalled_since_tick == last_tick:
+            self.slow_steps[-1]["duration_ms"] = round(blocked * 1000, 2)
+            return
+        self._stalled_since_tick = last_tick
+        handler, session_id = _task_labels(asyncio.current_task(loop))
+        step = {
+            "handler": handler,
+            "session_id": session_id,
+            "duration_ms": round(blocked * 1000, 2),
+            "stack": ";".join(_collapse(frame)) if frame is not None else None,
+        }
+        self.slow_steps.append(step)
+        logger.warning(f"Event loop blocked: {handler} (session: {session_id}) for at least {step['duration_ms']} ms")
+
+
+# --- Sampling Profiler ---
+class AsyncioSamplingProfiler:
+    """
+    A time-boxed, in-process sampling profiler for the event loop thread.
+
+    A background thread wakes every `interval` seconds, grabs the loop
+    thread's current Python stack and attributes it to the asyncio task that
+    is running at that moment (and, through the task name, to a handler and
+    session_id). When the run finishes, the awaiting stacks of every live task
+    are added as well so suspended tasks are visible too.
+
+    Slow event-loop steps are timed per Handle on the stock asyncio loop and
+    caught by a heartbeat (LoopStallDetector) on any other loop, such as
+    uvloop; the result's "slow_callback_detector" says which one ran.
+
+    Nothing runs while the profiler is idle; only one run can be active at a time.
+    """
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.samples = Counter()
+        self.by_session = Counter()
+        self.by_handler = Counter()
+        self.awaiting = Counter()
+        self.sample_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, interval: float = 0.005, slow_callback_threshold: float = 0.1) -> dict:
+        """Profiles the running event loop for `seconds` and returns the aggregated result."""
+        seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+        interval = max(interval, MIN_INTERVAL_SECONDS)
+        async with self._lock:
+            self._reset()
+            loop = asyncio.get_running_loop()
+            stop = threading.Event()
+            detector = SlowCallbackDetector(slow_callback_threshold)
+            stall_detector = None
+            heartbeat = None
+            if not detector.install(loop):
+                logger.warning(f"Slow callback timing is not supported on {type(loop).__name__}; using the heartbeat stall detector.")
+                stall_detector = LoopStallDetector(slow_callback_threshold)
+                heartbeat = asyncio.create_task(stall_detector.heartbeat(), name="profiler_heartbeat")
+            sampler = threading.Thread(
+                target=self._sample,
+                args=(loop, threading.get_ident(), interval, stop, stall_detector),
+                name="asyncio-sampling-profiler",
+                daemon=True,
+            )
+            started = time.perf_counter()
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                detector.uninstall()
+                if heartbeat is not None:
+                    heartbeat.cancel()
+                    await asyncio.gather(heartbeat, return_exceptions=True)
+                await asyncio.to_thread(sampler.join)
+            self._snapshot_awaiting(loop)
+            return {
+                "duration_seconds": round(time.perf_counter() - started, 3),
+                "interval_seconds": interval,
+                "sample_count": self.sample_count,
+                "by_session": dict(self.by_session.most_common()),
+                "by_handler": dict(self.by_handler.most_common()),
+                "slow_callback_detector": "heartbeat" if stall_detector else "handle_timing",
+                "slow_callbacks": stall_detector.slow_steps if stall_detector else detector.slow_steps,
+                "collapsed": self.collapsed(),
+            }
+
+    def _sample(self, loop, loop_thread_id: int, interval: float, stop: threading.Event, stall_detector=None):
+        while not stop.wait(interval):
+            frame = sys._current_frames().get(loop_thread_id)
+            if stall_detector is not None:
+                stall_detector.check(loop, frame)
+            if frame is None:
+                continue
+            handler, session_id = _task_labels(asyncio.current_task(loop))
+            stack = _collapse(frame)
+            del frame
+            prefix = [f"session:{session_id}"] if session_id else []
+            self.samples[";".join(prefix + [handler] + stack)] += 1
+            self.by_handler[handler] += 1
+            if session_id:
+                self.by_session[session_id] += 1
+            self.sample_count += 1
+
+    def _snapshot_awaiting(self, loop):
+        for task in asyncio.all_tasks(loop):
+            if task is asyncio.current_task(loop):
+                continue
+            handler, session_id = _task_labels(task)
+            frames = [_frame_label(f) for f in task.get_stack(limit=MAX_STACK_DEPTH)]
+            prefix = [f"session:{session_id}"] if session_id else []
+            self.awaiting[";".join(["[awaiting]"] + prefix + [handler] + frames)] += 1
+
+    def collapsed(self) -> str:
+        """Renders the samples in the collapsed-stack format used by flamegraph.pl and speedscope."""
+        lines = [f"{stack} {count}" for stack, count in self.samples.most_common()]
+        lines += [f"{stack} {count}" for stack, count in self.awaiting.most_common()]
+        return "\n".join(lines) + "\n"
+
+
+profiler = AsyncioSamplingProfiler()
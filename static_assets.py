@@ -0,0 +1,198 @@
+# static_assets.py
+#
+# Build step and server side for the frontend assets.
+#
+#   python static_assets.py [source_dir] [output_dir]
+#
+# gives every asset in frontend/static a content-hashed filename, rewrites
+# the references between them (including index.html), and writes .gz (and
+# .br, when the `brotli` package is installed) variants next to each file.
+# PrecompressedStaticFiles then serves those variants.
+#
+# Sources are not minified: a correct JS minifier needs a real tokenizer, and
+# once the files are compressed whitespace stripping saves very little.
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import sys
+from mimetypes import guess_type
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = Path("frontend/static")
+BUILD_DIR = Path("frontend/dist")
+MANIFEST_NAME = "manifest.json"
+ENTRY_POINT = "index.html"
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".json", ".svg"}
+# Files smaller than this are not worth a compressed variant.
+MIN_COMPRESS_SIZE = 256
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[A-Za-z0-9]+$")
+
+
+# --- Build ---
+def _hashed_name(rel_path: str, content: bytes) -> str:
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, suffix = os.path.splitext(rel_path)
+    return f"{stem}.{digest}{suffix}"
+
+
+def _reference_spellings(target: str, referrer: str) -> list:
+    """The ways `referrer` may spell a reference to `target` (both relative to the static root)."""
+    relative = os.path.relpath(target, os.path.dirname(referrer) or ".").replace(os.sep, "/")
+    spellings = [f"/static/{target}", f"static/{target}", f"./{relative}"]
+    if not relative.startswith("."):
+        spellings.append(relative)
+    return spellings
+
+
+def _references(text: str, target: str, referrer: str) -> list:
+    return [s for s in _reference_spellings(target, referrer) if re.search(r"""(?<=["'(])""" + re.escape(s) + r"""(?=["')])""", text)]
+
+
+def _rewrite_references(text: str, manifest: dict, referrer: str) -> str:
+    for original, hashed in manifest.items():
+        for spelling in _references(text, original, referrer):
+            replacement = spelling[: len(spelling) - len(os.path.basename(original))] + os.path.basename(hashed)
+            text = re.sub(r"""(?<=["'(])""" + re.escape(spelling) + r"""(?=["')])""", replacement, text)
+    return text
+
+
+def _compress(path: Path):
+    data = path.read_bytes()
+    if path.suffix not in COMPRESSIBLE_SUFFIXES or len(data) < MIN_COMPRESS_SIZE:
+        return
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+
+def build(source_dir: Path = SOURCE_DIR, build_dir: Path = BUILD_DIR) -> dict:
+    """
+    Builds the fingerprinted assets into `build_dir` and returns the manifest
+    mapping each original path to its hashed path. Assets are processed
+    leaves-first so a file's hash covers the hashed names it refers to.
+    """
+    sources = {}
+    for path in sorted(source_dir.rglob("*")):
+        if path.is_file():
+            rel_path = path.relative_to(source_dir).as_posix()
+            sources[rel_path] = path.read_bytes()
+
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+    build_dir.mkdir(parents=True)
+
+    manifest = {}
+    pending = {p for p in sources if p != ENTRY_POINT}
+    while pending:
+        ready = []
+        for rel_path in sorted(pending):
+            text = sources[rel_path].decode("utf-8", errors="ignore")
+            if not any(_references(text, dep, rel_path) for dep in pending if dep != rel_path):
+                ready.append(rel_path)
+        if not ready:
+            raise ValueError(f"Circular references between static assets: {sorted(pending)}")
+        for rel_path in ready:
+            data = sources[rel_path]
+            if Path(rel_path).suffix in COMPRESSIBLE_SUFFIXES:
+                data = _rewrite_references(data.decode("utf-8"), manifest, rel_path).encode("utf-8")
+            manifest[rel_path] = _hashed_name(rel_path, data)
+            sources[rel_path] = data
+            pending.discard(rel_path)
+
+    for rel_path, data in sources.items():
+        if rel_path == ENTRY_POINT:
+            data = _rewrite_references(data.decode("utf-8"), manifest, rel_path).encode("utf-8")
+        out_path = build_dir / manifest.get(rel_path, rel_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_bytes(data)
+        _compress(out_path)
+
+    (build_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return manifest
+
+
+# --- Serving ---
+def _accepted_encodings(scope) -> set:
+    accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+    encodings = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(coding.strip().lower())
+    return encodings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    StaticFiles that serves a .br or .gz sibling when the client accepts it,
+    and marks content-hashed filenames as immutable. Everything else is
+    served with `no-cache` so it is always revalidated against its ETag.
+    """
+    ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        media_path = str(full_path)
+        headers = {
+            "Vary": "Accept-Encoding",
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(media_path) else REVALIDATE_CACHE_CONTROL,
+        }
+        accepted = _accepted_encodings(scope)
+        for encoding, suffix in self.ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                encoded_stat = os.stat(media_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(encoded_stat.st_mode):
+                full_path, stat_result = media_path + suffix, encoded_stat
+                headers["Content-Encoding"] = encoding
+                break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=guess_type(media_path)[0] or "text/plain",
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def asset_dir() -> Path:
+    """The built assets when `python static_assets.py` has been run, the sources otherwise."""
+    return BUILD_DIR if (BUILD_DIR / ENTRY_POINT).is_file() else SOURCE_DIR
+
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else SOURCE_DIR
+    target = Path(sys.argv[2]) if len(sys.argv) > 2 else BUILD_DIR
+    result = build(source, target)
+    for original, hashed in sorted(result.items()):
+        print(f"{original} -> {hashed}")
+    print(f"Built {len(result)} assets into {target} (brotli: {'yes' if brotli else 'no'}).")
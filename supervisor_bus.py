@@ -0,0 +1,95 @@
+# supervisor_bus.py
+
+import asyncio
+import json
+import time
+from collections import deque
+
+# Default number of serialized events buffered per supervisor before the oldest are dropped.
+DEFAULT_QUEUE_SIZE = 1000
+
+
+class Subscriber:
+    """
+    A single supervisor's view of the bus. Events are buffered in a bounded
+    deque; when it is full the oldest event is dropped so a slow dashboard
+    never pushes back on the publisher.
+    """
+    def __init__(self, session_ids=None, event_types=None, maxsize: int = DEFAULT_QUEUE_SIZE):
+        self.session_ids = set(session_ids) if session_ids else None
+        self.event_types = set(event_types) if event_types else None
+        self.dropped = 0
+        self._queue = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+
+    def matches(self, session_id: str, event_type: str) -> bool:
+        if self.session_ids is not None and session_id not in self.session_ids:
+            return False
+        if self.event_types is not None and event_type not in self.event_types:
+            return False
+        return True
+
+    def put(self, message: str):
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(message)
+        self._ready.set()
+
+    async def get(self) -> str:
+        while not self._queue:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self.get()
+
+
+class SessionEventBus:
+    """
+    In-process pub/sub for live session events, fed from agent_to_client_messaging.
+
+    publish() never awaits: each event is serialized at most once, and only when
+    at least one subscriber wants it, and the same string is shared by every
+    matching subscriber. With no supervisors connected a publish is a single
+    emptiness check.
+    """
+    def __init__(self):
+        self._subscribers = set()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def wants(self, session_id: str, event_type: str) -> bool:
+        return any(s.matches(session_id, event_type) for s in self._subscribers)
+
+    def subscribe(self, session_ids=None, event_types=None, maxsize: int = DEFAULT_QUEUE_SIZE) -> Subscriber:
+        subscriber = Subscriber(session_ids, event_types, maxsize)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, session_id: str, event_type: str, data=None):
+        if not self._subscribers:
+            return
+        targets = [s for s in self._subscribers if s.matches(session_id, event_type)]
+        if not targets:
+            return
+        message = json.dumps({"session_id": session_id, "type": event_type, "ts": time.time(), "data": data})
+        for subscriber in targets:
+            subscriber.put(message)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "dropped": sum(s.dropped for s in self._subscribers),
+        }
+
+
+event_bus = SessionEventBus()
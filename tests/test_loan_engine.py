@@ -0,0 +1,61 @@
+# tests/test_loan_engine.py
+#
+#   python -m pytest -q tests
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banking_agent import loan_engine  # noqa: E402
+from banking_agent.context import OmnibankContext  # noqa: E402
+
+PERSONAL_LOAN = OmnibankContext.MOCK_LOAN_PRODUCTS["personal_loan"]
+ZERO_APR_LOAN = {"name": "Promo Loan", "interest_rate": "0% APR", "max_term_months": 24}
+
+
+def test_parse_apr():
+    assert loan_engine.parse_apr("5.5% APR") == pytest.approx(0.055)
+    with pytest.raises(ValueError):
+        loan_engine.parse_apr("call us")
+
+
+def test_monthly_payments_match_the_annuity_formula():
+    payments = loan_engine.monthly_payments(0.055, [10_000, 20_000], [36, 60])
+    assert payments.shape == (2, 2)
+    assert payments[0, 1] == pytest.approx(191.01, abs=0.005)
+    assert payments[1, 0] == pytest.approx(603.92, abs=0.005)
+
+
+def test_zero_apr_spreads_principal_evenly():
+    assert loan_engine.monthly_payments(0.0, [1_200], [12])[0, 0] == pytest.approx(100.0)
+    result = loan_engine.quote(ZERO_APR_LOAN, 2_400, [24])
+    assert result["quotes"] == [{"term_months": 24, "monthly_payment": 100.0, "total_interest": 0.0}]
+
+
+def test_quote_rejects_terms_over_the_product_maximum():
+    result = loan_engine.quote(PERSONAL_LOAN, 10_000, [60, 72, 0])
+    assert [q["term_months"] for q in result["quotes"]] == [60]
+    assert result["rejected_terms"] == [0, 72]
+
+
+@pytest.mark.parametrize("apr", [0.0, 0.055])
+def test_schedule_balance_reaches_zero_at_the_end_of_each_term(apr):
+    terms = [12, 36, 60]
+    schedules = loan_engine.amortization_schedules(apr, [10_000, 25_000], terms)
+    for j, term in enumerate(terms):
+        assert np.allclose(schedules["balance"][:, j, term - 1], 0.0, atol=1e-6)
+        assert np.isnan(schedules["balance"][:, j, term:]).all()
+        assert np.allclose(np.nansum(schedules["principal"][:, j, :], axis=1), [10_000, 25_000])
+
+
+def test_first_year_split_covers_twelve_payments_and_applies_the_term_limit():
+    split = loan_engine.first_year_split(PERSONAL_LOAN, 10_000, 60)
+    payment = loan_engine.quote(PERSONAL_LOAN, 10_000, [60])["quotes"][0]["monthly_payment"]
+    assert split["months"] == 12
+    assert split["principal"] + split["interest"] == pytest.approx(12 * payment, abs=0.05)
+    assert loan_engine.first_year_split(PERSONAL_LOAN, 1_000, 6)["months"] == 6
+    with pytest.raises(ValueError):
+        loan_engine.first_year_split(PERSONAL_LOAN, 10_000, 72)
@@ -0,0 +1,154 @@
+# tests/test_tool_executor.py
+#
+#   python -m pytest -q tests
+
+import asyncio
+import copy
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from banking_agent import tools  # noqa: E402
+from banking_agent.context import OmnibankContext  # noqa: E402
+from banking_agent.executor import PENDING_RESULT, TIMEOUT_RESULT, ToolExecutor, with_simulated_latency  # noqa: E402
+
+TICK = 0.010
+MAX_P99_LOOP_LAG = 0.050
+
+
+def get_account_balance() -> dict:
+    return {"status": "success", "message": "Your current balance is $25,000.50."}
+
+
+def make_payment() -> dict:
+    return {"status": "success", "message": "Payment sent."}
+
+
+def _p99(samples: list) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))]
+
+
+def test_slow_blocking_tools_keep_loop_lag_low():
+    async def scenario():
+        executor = ToolExecutor(max_workers=32)
+        tool = executor.wrap(with_simulated_latency(get_account_balance, 0.05), backend="core_banking")
+        lags = []
+        stop = asyncio.Event()
+
+        async def heartbeat():
+            while not stop.is_set():
+                expected = time.perf_counter() + TICK
+                await asyncio.sleep(TICK)
+                lags.append(max(0.0, time.perf_counter() - expected))
+
+        ticker = asyncio.create_task(heartbeat())
+        results = await asyncio.gather(*(tool() for _ in range(200)))
+        stop.set()
+        await ticker
+        return results, lags
+
+    results, lags = asyncio.run(scenario())
+    assert all(r["status"] == "success" for r in results)
+    assert _p99(lags) < MAX_P99_LOOP_LAG
+
+
+def test_timeout_of_a_started_mutating_tool_is_not_retryable():
+    async def scenario():
+        executor = ToolExecutor(max_workers=4, timeout=0.05)
+        read = executor.wrap(with_simulated_latency(get_account_balance, 0.2))
+        write = executor.wrap(with_simulated_latency(make_payment, 0.2), mutating=True)
+        return await read(), await write()
+
+    read_result, write_result = asyncio.run(scenario())
+    assert read_result == TIMEOUT_RESULT
+    assert write_result == PENDING_RESULT
+
+
+def test_mutating_tool_that_never_got_a_backend_slot_is_retryable():
+    async def scenario():
+        executor = ToolExecutor(max_workers=4, timeout=0.05, backend_limits={"core_banking": 1})
+        write = executor.wrap(with_simulated_latency(make_payment, 0.2), backend="core_banking", mutating=True)
+        return await asyncio.gather(write(), write())
+
+    first, second = asyncio.run(scenario())
+    assert first == PENDING_RESULT
+    assert second == TIMEOUT_RESULT
+
+
+def test_concurrent_payments_do_not_lose_updates_or_overdraw():
+    state = copy.deepcopy(OmnibankContext.CUSTOMER_BANKING_CONTEXT)
+    state["is_identity_verified"] = True
+    state["current_account_details"] = state["all_accounts"]["ACC778899001"]
+    state["all_accounts"]["ACC778899001"]["balance"] = 1000.0
+    state["all_accounts"]["ACC123456789"]["balance"] = 0.0
+    tools.session_context.set(SimpleNamespace(id="test", state=state))
+
+    async def scenario():
+        executor = ToolExecutor(max_workers=32)
+        pay = executor.wrap(tools.make_payment, backend="core_banking", mutating=True)
+        return await asyncio.gather(*(pay("ACC123456789", 10.0) for _ in range(150)))
+
+    results = asyncio.run(scenario())
+    accounts = state["all_accounts"]
+    assert sum(r["status"] == "success" for r in results) == 100
+    assert sum(r["status"] == "insufficient_funds" for r in results) == 50
+    assert accounts["ACC778899001"]["balance"] == 0.0
+    assert accounts["ACC123456789"]["balance"] == 1000.0
+
+
+def test_backend_cap_holds_while_timed_out_calls_are_still_running():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_backend_call() -> dict:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.3)
+        with lock:
+            running -= 1
+        return {"status": "success"}
+
+    async def scenario():
+        executor = ToolExecutor(max_workers=8, timeout=0.05, backend_limits={"core_banking": 1})
+        tool = executor.wrap(slow_backend_call, backend="core_banking")
+        results = [await tool() for _ in range(5)]
+        await asyncio.sleep(0.4)
+        return results
+
+    results = asyncio.run(scenario())
+    assert all(r == TIMEOUT_RESULT for r in results)
+    assert peak == 1
+
+
+def test_read_only_tools_do_not_wait_for_the_state_lock():
+    state = copy.deepcopy(OmnibankContext.CUSTOMER_BANKING_CONTEXT)
+    state["is_identity_verified"] = True
+    state["current_customer_profile"] = state["all_customer_profiles"]["cust_rakeshG"]
+    state["current_account_details"] = state["all_accounts"]["ACC778899001"]
+    tools.session_context.set(SimpleNamespace(id="test", state=state))
+    read_only = [
+        (tools.get_account_balance, ()),
+        (tools.check_account_status, ()),
+        (tools.get_loan_details, ()),
+        (tools.get_loan_quote, ("personal_loan", 10_000, [36])),
+        (tools.list_recent_transactions, ()),
+        (tools.get_spending_summary, ("last_30_days",)),
+        (tools.get_category_spending, ("groceries", "last_30_days")),
+    ]
+
+    async def scenario():
+        executor = ToolExecutor(max_workers=8, timeout=1.0)
+        calls = [executor.wrap(func, backend="core_banking")(*args) for func, args in read_only]
+        return await asyncio.gather(*calls)
+
+    # Held by this thread for the whole run; the tools run on the executor's threads.
+    with OmnibankContext.STATE_LOCK:
+        results = asyncio.run(scenario())
+    assert not [r for r in results if r.get("status") in ("timeout", "error")]
@@ -0,0 +1,215 @@
+# transcripts.py
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_DB_PATH = os.getenv("TRANSCRIPT_DB_PATH", "transcripts.db")
+# The writer commits whenever it has this many utterances, or after FLUSH_INTERVAL seconds.
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.5
+# Utterances waiting for the writer. When it falls this far behind (or was never started),
+# new utterances are dropped and counted rather than growing memory without limit.
+MAX_PENDING = int(os.getenv("TRANSCRIPT_MAX_PENDING", "100000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS utterances (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    turn INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    text TEXT NOT NULL,
+    translated TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS utterances_session ON utterances(session_id, turn);
+CREATE INDEX IF NOT EXISTS utterances_started_at ON utterances(started_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts USING fts5(
+    text, translated, content='utterances', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS utterances_ai AFTER INSERT ON utterances BEGIN
+    INSERT INTO utterances_fts(rowid, text, translated) VALUES (new.id, new.text, new.translated);
+END;
+"""
+
+_INSERT = (
+    "INSERT INTO utterances (session_id, turn, role, text, translated, started_at, ended_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+class SessionTranscript:
+    """
+    Aggregates the transcription fragments of one live session into whole
+    utterances. Fragments are buffered per speaker and handed to the store
+    when the turn ends or the other party starts speaking.
+    """
+    def __init__(self, store, session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self.turn = 0
+        self._role = None
+        self._text = []
+        self._translated = []
+        self._final_text = None
+        self._started_at = None
+
+    def _switch_to(self, role: str):
+        if self._role != role:
+            self.flush()
+            self._role = role
+            self._started_at = time.time()
+
+    def add_input(self, text: str, translated: str = None):
+        """Records a fragment of the caller's input transcription and its translation."""
+        self._switch_to("user")
+        self._text.append(text)
+        if translated:
+            self._translated.append(translated)
+
+    def add_agent(self, text: str, partial: bool):
+        """Records agent speech; a final (non-partial) text replaces the streamed fragments."""
+        self._switch_to("model")
+        if partial:
+            self._text.append(text)
+        else:
+            self._final_text = text
+
+    def end_turn(self):
+        self.flush()
+        self.turn += 1
+
+    def flush(self):
+        text = self._final_text if self._final_text is not None else "".join(self._text)
+        if self._role and text.strip():
+            translated = "".join(self._translated) or None
+            self.store.add((self.session_id, self.turn, self._role, text.strip(), translated, self._started_at, time.time()))
+        self._role = None
+        self._text = []
+        self._translated = []
+        self._final_text = None
+        self._started_at = None
+
+
+class TranscriptStore:
+    """
+    Persists utterances to SQLite and keeps an FTS5 index over them.
+
+    add() is safe to call from the event loop: it only enqueues the row. A
+    background thread drains the queue and writes in batches, one transaction
+    per batch, with the FTS index updated incrementally by an insert trigger.
+    The queue holds at most `max_pending` rows; beyond that add() drops the
+    row and counts it in `dropped`.
+    """
+    def __init__(self, path: str = TRANSCRIPT_DB_PATH, max_pending: int = MAX_PENDING):
+        self.path = path
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = None
+        self._stopping = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def start(self):
+        if self._writer:
+            return
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._stopping.clear()
+        self._writer = threading.Thread(target=self._write_loop, name="transcript-writer", daemon=True)
+        self._writer.start()
+
+    def close(self):
+        """Stops the writer after it has flushed everything queued so far."""
+        if not self._writer:
+            return
+        self._stopping.set()
+        self._writer.join()
+        self._writer = None
+
+    def session(self, session_id: str) -> SessionTranscript:
+        return SessionTranscript(self, session_id)
+
+    def add(self, row: tuple):
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            # Log the first drop and then every 1000th, so a stalled writer cannot flood the logs.
+            if self.dropped % 1000 == 1:
+                logger.error(f"Transcript queue full ({self._queue.maxsize} pending); {self.dropped} utterances dropped so far.")
+
+    def stats(self) -> dict:
+        return {"pending": self._queue.qsize(), "dropped": self.dropped, "writer_running": self._writer is not None}
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch:
+                    try:
+                        with conn:
+                            conn.executemany(_INSERT, batch)
+                    except sqlite3.Error as e:
+                        logger.error(f"Failed to write {len(batch)} utterances: {e}")
+                elif self._stopping.is_set():
+                    return
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> list:
+        batch = []
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def search(self, query: str, since: float = None, session_id: str = None, limit: int = 50) -> list:
+        """
+        Full-text search over utterance text and translations, newest first.
+        `query` uses FTS5 syntax, e.g. '"unlock account"' or 'unlock AND card'.
+        This is a blocking call; run it off the event loop.
+        """
+        sql = (
+            "SELECT u.session_id, u.turn, u.role, u.text, u.translated, u.started_at "
+            "FROM utterances_fts JOIN utterances u ON u.id = utterances_fts.rowid "
+            "WHERE utterances_fts MATCH ?"
+        )
+        params = [query]
+        if since is not None:
+            sql += " AND u.started_at >= ?"
+            params.append(since)
+        if session_id:
+            sql += " AND u.session_id = ?"
+            params.append(session_id)
+        sql += " ORDER BY u.started_at DESC LIMIT ?"
+        params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return [
+            {"session_id": r[0], "turn": r[1], "role": r[2], "text": r[3], "translated": r[4], "started_at": r[5]}
+            for r in rows
+        ]
+
+
+transcript_store = TranscriptStore()